@@ -1,38 +1,57 @@
+import io
 import json
 import sys
-from typing import List
+from typing import List, TextIO
 
-from .hl7 import split_messages, parse_message
+from .hl7 import iter_messages_from_file, parse_message
 from .siu_s12 import parse_siu_s12_appointment
 from .exceptions import HL7Error
 
 
+# JSON output is batched and written in chunks of roughly this many characters.
+_OUT_BATCH_SIZE = 64 * 1024
+
+
+def _drain(buf: io.StringIO, out: TextIO) -> None:
+    out.write(buf.getvalue())
+    out.flush()
+    buf.seek(0)
+    buf.truncate()
+
+
 def main(argv: List[str]) -> int:
     if len(argv) != 2:
         print("Usage: python -m hl7_siu_parser.cli input.hl7", file=sys.stderr)
         return 2
 
     path = argv[1]
-    raw = ""
-    with open(path, "r", encoding="utf-8", errors="replace") as f:
-        raw = f.read()
-
-    msgs = split_messages(raw)
-    if not msgs:
+    buf = io.StringIO()
+    exit_code = 0
+    count = 0
+    try:
+        for i, raw_msg in enumerate(iter_messages_from_file(path), start=1):
+            count = i
+            try:
+                msg = parse_message(raw_msg)
+                appt = parse_siu_s12_appointment(msg)
+                buf.write(json.dumps(appt, ensure_ascii=False, indent=2))
+                buf.write("\n")
+                if buf.tell() >= _OUT_BATCH_SIZE:
+                    _drain(buf, sys.stdout)
+            except HL7Error as e:
+                exit_code = 1
+                # Keep stdout/stderr ordering intact: emit pending records before the error.
+                _drain(buf, sys.stdout)
+                err_obj = {"message_index": i, "error": type(e).__name__, "detail": str(e)}
+                print(json.dumps(err_obj, ensure_ascii=False), file=sys.stderr)
+    finally:
+        # Also on unexpected errors: records parsed so far must not be lost.
+        _drain(buf, sys.stdout)
+
+    if not count:
         print("No HL7 messages found (no MSH segments).", file=sys.stderr)
         return 1
 
-    exit_code = 0
-    for i, raw_msg in enumerate(msgs, start=1):
-        try:
-            msg = parse_message(raw_msg)
-            appt = parse_siu_s12_appointment(msg)
-            print(json.dumps(appt, ensure_ascii=False, indent=2))
-        except HL7Error as e:
-            exit_code = 1
-            err_obj = {"message_index": i, "error": type(e).__name__, "detail": str(e)}
-            print(json.dumps(err_obj, ensure_ascii=False), file=sys.stderr)
-
     return exit_code
 
 
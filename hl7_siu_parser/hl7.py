@@ -1,33 +1,132 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
-from typing import Dict, List, Optional
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+import functools
+import itertools
 import re
+import sys
 from datetime import datetime, date, timezone, timedelta
 
 from .exceptions import HL7ParseError
 
 
-@dataclass(frozen=True)
+_ESCAPE_MAP_KEYS = {
+    "F": "field",
+    "S": "component",
+    "R": "repetition",
+    "E": "escape",
+    "T": "subcomponent",
+}
+
+
+@dataclass(frozen=True, slots=True)
 class Separators:
     field: str
     component: str
     repetition: str
     escape: str
     subcomponent: str
+    # Escape code ("F", "S", ...) -> replacement char, precomputed for unescape_hl7.
+    escape_table: Dict[str, str] = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        table = {code: getattr(self, name) for code, name in _ESCAPE_MAP_KEYS.items()}
+        object.__setattr__(self, "escape_table", table)
 
 
 class HL7Message:
     """
-    Stores segments as: segments["PID"] -> list of occurrences (each occurrence is a list[str] fields)
+    Stores segments as flat parallel lists in message order:
+      - _seg_names[i]   -> segment name ("MSH", "PID", ...)
+      - _seg_fields[i]  -> list of raw field strings
+      - _seg_esc[i]     -> False when the segment holds no escape char (reads skip unescaping)
+    plus segment_positions["PID"] -> list of positions of each PID occurrence in those lists.
+    segments["PID"] still gives the list of occurrences (each a list[str] of fields).
     Fields indexing aligns with HL7 field numbers:
       - For non-MSH: fields[0] = segment name, fields[1] = SEG-1, fields[2] = SEG-2, ...
       - For MSH: fields[0] = "MSH", fields[1] = MSH-1 (field sep), fields[2] = MSH-2 (encoding chars), ...
     """
 
-    def __init__(self, seps: Separators, segments: Dict[str, List[List[str]]]):
+    __slots__ = ("seps", "_seg_names", "_seg_fields", "_seg_esc", "_index")
+
+    def __init__(
+        self,
+        seps: Separators,
+        seg_names: List[str],
+        seg_fields: List[List[str]],
+        seg_esc: List[bool],
+        index: Dict[str, List[int]],
+    ):
         self.seps = seps
-        self.segments = segments
+        self._seg_names = seg_names
+        self._seg_fields = seg_fields
+        self._seg_esc = seg_esc
+        self._index = index
+
+    @property
+    def segment_positions(self) -> Dict[str, List[int]]:
+        """Segment name -> positions of its occurrences, for find_segment() and the *_at accessors."""
+        return self._index
+
+    @property
+    def segments(self) -> Dict[str, List[List[str]]]:
+        """
+        Segment name -> list of occurrences (each a list of raw fields), as before.
+        Built on every access and not stored; prefer segment_positions / get_field.
+        """
+        fields = self._seg_fields
+        return {name: [fields[p] for p in positions] for name, positions in self._index.items()}
+
+    def find_segment(self, seg: str, seg_index: int = 0) -> Optional[int]:
+        """Position of one segment occurrence (for the *_at accessors), or None if absent."""
+        positions = self._index.get(seg)
+        if not positions or seg_index >= len(positions):
+            return None
+        return positions[seg_index]
+
+    # Positional accessors: take a find_segment() result (None reads as empty) so
+    # callers reading many fields of one segment look it up only once.
+
+    def field_at(self, pos: Optional[int], field_num: int) -> str:
+        if pos is None:
+            return ""
+        fields = self._seg_fields[pos]
+        return fields[field_num] if field_num < len(fields) else ""
+
+    def component_at(self, pos: Optional[int], field_num: int, comp_num: int, rep_index: int = 0) -> str:
+        if comp_num <= 0:
+            return ""
+        raw = self.field_at(pos, field_num)
+        if not raw:
+            return ""
+
+        reps = raw.split(self.seps.repetition) if self.seps.repetition else [raw]
+        if rep_index >= len(reps):
+            return ""
+
+        rep_val = reps[rep_index]
+        comps = rep_val.split(self.seps.component) if self.seps.component else [rep_val]
+        if comp_num > len(comps):
+            return ""
+
+        value = comps[comp_num - 1]
+        return unescape_hl7(value, self.seps) if self._seg_esc[pos] else value
+
+    def components_at(self, pos: Optional[int], field_num: int, rep_index: int = 0) -> Tuple[str, ...]:
+        raw = self.field_at(pos, field_num)
+        if not raw:
+            return ()
+
+        reps = raw.split(self.seps.repetition)
+        if rep_index >= len(reps):
+            return ()
+
+        seps = self.seps
+        comps = tuple(reps[rep_index].split(seps.component))
+        if not self._seg_esc[pos]:
+            return comps
+        return tuple(unescape_hl7(c, seps) for c in comps)
 
     def get_field(
         self,
@@ -36,13 +135,7 @@ class HL7Message:
         seg_index: int = 0,
         default: str = "",
     ) -> str:
-        occs = self.segments.get(seg)
-        if not occs or seg_index >= len(occs):
-            return default
-        fields = occs[seg_index]
-        if field_num >= len(fields):
-            return default
-        return fields[field_num] or default
+        return self.field_at(self.find_segment(seg, seg_index), field_num) or default
 
     def get_component(
         self,
@@ -53,23 +146,18 @@ class HL7Message:
         rep_index: int = 0,
         default: str = "",
     ) -> str:
-        raw = self.get_field(seg, field_num, seg_index=seg_index, default=default)
-        if not raw:
-            return default
-
-        reps = raw.split(self.seps.repetition) if self.seps.repetition else [raw]
-        if rep_index >= len(reps):
-            return default
+        pos = self.find_segment(seg, seg_index)
+        return self.component_at(pos, field_num, comp_num, rep_index) or default
 
-        rep_val = reps[rep_index]
-        comps = rep_val.split(self.seps.component) if self.seps.component else [rep_val]
-        if comp_num <= 0:
-            return default
-        idx = comp_num - 1
-        if idx >= len(comps):
-            return default
-
-        return unescape_hl7(comps[idx], self.seps) or default
+    def get_components(
+        self,
+        seg: str,
+        field_num: int,
+        seg_index: int = 0,
+        rep_index: int = 0,
+    ) -> Tuple[str, ...]:
+        """All (unescaped) components of one field repetition; () if absent."""
+        return self.components_at(self.find_segment(seg, seg_index), field_num, rep_index)
 
 
 def normalize_newlines(raw: str) -> str:
@@ -79,83 +167,120 @@ def normalize_newlines(raw: str) -> str:
     return raw.lstrip("\ufeff")
 
 
+def iter_segments(raw: str) -> List[str]:
+    """
+    Non-blank segment lines of raw, in order.
+    Segments may end in \r, \n or \r\n; a leading BOM is dropped.
+    """
+    raw = raw.lstrip("\ufeff").replace("\r\n", "\r").replace("\n", "\r")
+    return [s for s in raw.split("\r") if s.strip()]
+
+
+def _group_messages(seg_lines: Iterable[str]) -> Iterator[str]:
+    # Uses 'MSH' at the start of a segment line as the message boundary.
+    lines: List[str] = []
+    for line in seg_lines:
+        if line.startswith("MSH"):
+            if lines:
+                yield "\r".join(lines) + "\r"
+            lines = [line]
+        elif lines:
+            lines.append(line)
+    if lines:
+        yield "\r".join(lines) + "\r"
+
+
 def split_messages(raw: str) -> List[str]:
     """
     Split a file that may contain multiple HL7 messages.
     Uses 'MSH' at the start of a segment line as the boundary.
     """
-    raw = normalize_newlines(raw)
-    segments = [s for s in raw.split("\r") if s.strip()]
+    return list(_group_messages(iter_segments(raw)))
 
-    msh_indexes = [i for i, seg in enumerate(segments) if seg.startswith("MSH")]
-    if not msh_indexes:
-        return []
 
-    messages: List[str] = []
-    for idx, start in enumerate(msh_indexes):
-        end = msh_indexes[idx + 1] if idx + 1 < len(msh_indexes) else len(segments)
-        messages.append("\r".join(segments[start:end]) + "\r")
-    return messages
+def iter_messages_from_file(path: str) -> Iterator[str]:
+    """
+    Stream the HL7 messages in a file one at a time (same boundaries as split_messages).
+    The file is read line by line, so only the current message is held in memory.
+    """
+    with open(path, "r", encoding="utf-8", errors="replace") as f:
+        # Universal newlines already turn \r and \r\n into line breaks, so each line is
+        # one segment. As in split_messages, a BOM is only dropped at the start of the file.
+        first = f.readline().lstrip("\ufeff")
+        seg_lines = (line.rstrip("\r\n") for line in itertools.chain((first,), f))
+        yield from _group_messages(line for line in seg_lines if line.strip())
+
+
+@functools.lru_cache(maxsize=32)
+def _separators(field_sep: str, enc: str) -> Separators:
+    # A feed uses one or two separator sets; build each Separators once, not per message.
+    return Separators(
+        field=field_sep,
+        component=enc[0] if len(enc) > 0 else "^",
+        repetition=enc[1] if len(enc) > 1 else "~",
+        escape=enc[2] if len(enc) > 2 else "\\",
+        subcomponent=enc[3] if len(enc) > 3 else "&",
+    )
 
 
 def parse_message(message: str) -> HL7Message:
-    message = normalize_newlines(message)
-    seg_lines = [s for s in message.split("\r") if s.strip()]
+    seg_lines = iter_segments(message)
     if not seg_lines or not seg_lines[0].startswith("MSH"):
         raise HL7ParseError("Message does not start with MSH segment.")
+    msh_line = seg_lines[0]
 
     # Field separator is the 4th character in MSH line: MSH|^~\&
-    if len(seg_lines[0]) < 4:
+    if len(msh_line) < 4:
         raise HL7ParseError("MSH segment too short to contain field separator.")
-    field_sep = seg_lines[0][3]
+    field_sep = msh_line[3]
 
-    msh_parts = seg_lines[0].split(field_sep)
-    # msh_parts[0] = 'MSH', msh_parts[1] = encoding chars usually '^~\\&'
-    if len(msh_parts) < 2 or not msh_parts[1]:
+    # Only MSH-2 (encoding chars, usually '^~\\&') is needed here; the full MSH
+    # line is split with the other segments below.
+    _, _, rest = msh_line.partition(field_sep)
+    enc, _, _ = rest.partition(field_sep)
+    if not enc:
         enc = "^~\\&"
-    else:
-        enc = msh_parts[1]
-
-    component_sep = enc[0] if len(enc) > 0 else "^"
-    repetition_sep = enc[1] if len(enc) > 1 else "~"
-    escape_sep = enc[2] if len(enc) > 2 else "\\"
-    subcomponent_sep = enc[3] if len(enc) > 3 else "&"
 
-    seps = Separators(
-        field=field_sep,
-        component=component_sep,
-        repetition=repetition_sep,
-        escape=escape_sep,
-        subcomponent=subcomponent_sep,
-    )
+    seps = _separators(field_sep, enc)
+    escape_sep = seps.escape
 
-    segments: Dict[str, List[List[str]]] = {}
+    seg_names: List[str] = []
+    seg_fields: List[List[str]] = []
+    seg_esc: List[bool] = []
+    index: Dict[str, List[int]] = {}
 
     for line in seg_lines:
         if len(line) < 3:
             continue
-        name = line[:3]
+        name = sys.intern(line[:3])
         parts = line.split(field_sep)
 
         # Align fields with HL7 numbering conventions
         if name == "MSH":
             # Insert MSH-1 (field separator) at fields[1], keep encoding chars as fields[2]
             fields = ["MSH", field_sep] + parts[1:]
+            # MSH-2 always contains the escape char itself; only later fields count.
+            has_esc = any(escape_sep in p for p in parts[2:])
         else:
             fields = parts  # fields[1] -> SEG-1
+            has_esc = escape_sep in line
 
-        segments.setdefault(name, []).append(fields)
+        index.setdefault(name, []).append(len(seg_names))
+        seg_names.append(name)
+        seg_fields.append(fields)
+        seg_esc.append(has_esc)
 
-    return HL7Message(seps=seps, segments=segments)
+    return HL7Message(seps=seps, seg_names=seg_names, seg_fields=seg_fields, seg_esc=seg_esc, index=index)
 
 
-_ESCAPE_MAP_KEYS = {
-    "F": "field",
-    "S": "component",
-    "R": "repetition",
-    "E": "escape",
-    "T": "subcomponent",
-}
+_DEFAULT_ESC_RE = re.compile(r"\\(.+?)\\")
+
+
+@functools.lru_cache(maxsize=8)
+def _esc_pattern(esc_char: str) -> "re.Pattern[str]":
+    # Non-default escape chars are rare; compile once per distinct char.
+    esc = re.escape(esc_char)
+    return re.compile(rf"{esc}(.+?){esc}")
 
 
 def unescape_hl7(value: str, seps: Separators) -> str:
@@ -165,16 +290,11 @@ def unescape_hl7(value: str, seps: Separators) -> str:
     """
     if not value or seps.escape not in value:
         return value
-
-    esc = re.escape(seps.escape)
-    pattern = re.compile(rf"{esc}(.+?){esc}")
+    pattern = _DEFAULT_ESC_RE if seps.escape == "\\" else _esc_pattern(seps.escape)
+    table = seps.escape_table
 
     def repl(m: re.Match) -> str:
-        code = m.group(1)
-        if code in _ESCAPE_MAP_KEYS:
-            key = _ESCAPE_MAP_KEYS[code]
-            return getattr(seps, key)
-        return m.group(0)
+        return table.get(m.group(1), m.group(0))
 
     return pattern.sub(repl, value)
 
@@ -196,15 +316,84 @@ _TS_RE = re.compile(
 )
 
 
-def parse_hl7_date(value: str) -> Optional[date]:
-    if not value:
+# (yyyy, mm, dd, hh, mi, ss, microsecond, tz offset string or "")
+_TSFields = Tuple[int, int, int, int, int, int, int, str]
+
+
+def _parse_ts_positional(value: str) -> Optional[_TSFields]:
+    """
+    HL7 TS is positional: YYYY[MM[DD[HH[MM[SS]]]]][.S...][+/-ZZZZ].
+    Read it by offset; return None for anything not in exactly that shape.
+    """
+    if len(value) < 4 or not value[:4].isdecimal():
+        return None
+    n = len(value)
+    parts = [int(value[:4]), 1, 1, 0, 0, 0]
+    pos = 4
+    for i in range(1, 6):
+        chunk = value[pos:pos + 2]
+        if len(chunk) != 2 or not chunk.isdecimal():
+            break
+        parts[i] = int(chunk)
+        pos += 2
+
+    micro = 0
+    if pos < n and value[pos] == ".":
+        end = pos + 1
+        while end < n and value[end].isdecimal():
+            end += 1
+        if end == pos + 1:
+            return None
+        micro = int((value[pos + 1:end] + "000000")[:6])
+        pos = end
+
+    tz = ""
+    if pos < n and value[pos] in "+-":
+        tz = value[pos:pos + 5]
+        if len(tz) != 5 or not tz[1:].isdecimal():
+            return None
+        pos += 5
+
+    if pos != n:
         return None
+    yyyy, mm, dd, hh, mi, ss = parts
+    return yyyy, mm, dd, hh, mi, ss, micro, tz
+
+
+def _parse_ts_regex(value: str) -> Optional[_TSFields]:
     m = _TS_RE.match(value)
     if not m:
         return None
-    yyyy = int(m.group("yyyy"))
-    mm = int(m.group("mm") or "01")
-    dd = int(m.group("dd") or "01")
+
+    micro = 0
+    frac = m.group("fraction")
+    if frac:
+        frac_digits = frac[1:]
+        frac_digits = (frac_digits + "000000")[:6]
+        micro = int(frac_digits)
+
+    return (
+        int(m.group("yyyy")),
+        int(m.group("mm") or "01"),
+        int(m.group("dd") or "01"),
+        int(m.group("hh") or "00"),
+        int(m.group("mi") or "00"),
+        int(m.group("ss") or "00"),
+        micro,
+        m.group("tz") or "",
+    )
+
+
+def parse_hl7_date(value: str) -> Optional[date]:
+    if not value:
+        return None
+    # Plain YYYYMMDD (the usual DOB shape) needs no general TS parsing.
+    if len(value) == 8 and value.isdecimal():
+        return date(int(value[:4]), int(value[4:6]), int(value[6:8]))
+    fields = _parse_ts_positional(value) or _parse_ts_regex(value)
+    if fields is None:
+        return None
+    yyyy, mm, dd = fields[:3]
     return date(yyyy, mm, dd)
 
 
@@ -215,36 +404,58 @@ def parse_hl7_ts_to_datetime(value: str) -> Optional[datetime]:
     """
     if not value:
         return None
-    m = _TS_RE.match(value)
-    if not m:
+    # Positional read handles well-formed values; the regex only sees the odd leftovers.
+    fields = _parse_ts_positional(value) or _parse_ts_regex(value)
+    if fields is None:
         return None
 
-    yyyy = int(m.group("yyyy"))
-    mm = int(m.group("mm") or "01")
-    dd = int(m.group("dd") or "01")
-    hh = int(m.group("hh") or "00")
-    mi = int(m.group("mi") or "00")
-    ss = int(m.group("ss") or "00")
+    yyyy, mm, dd, hh, mi, ss, micro, tz = fields
+    tzinfo = _tz_from_offset(tz) if tz else timezone.utc
 
-    micro = 0
-    frac = m.group("fraction")
-    if frac:
-        frac_digits = frac[1:]
-        frac_digits = (frac_digits + "000000")[:6]
-        micro = int(frac_digits)
+    return datetime(yyyy, mm, dd, hh, mi, ss, microsecond=micro, tzinfo=tzinfo)
 
-    tz = m.group("tz")
-    if tz:
-        sign = 1 if tz[0] == "+" else -1
-        hours = int(tz[1:3])
-        mins = int(tz[3:5])
-        tzinfo = timezone(sign * timedelta(hours=hours, minutes=mins))
-    else:
-        tzinfo = timezone.utc
 
-    return datetime(yyyy, mm, dd, hh, mi, ss, microsecond=micro, tzinfo=tzinfo)
+@functools.lru_cache(maxsize=64)
+def _tz_from_offset(tz: str) -> timezone:
+    # Feeds use a handful of offsets; share one tzinfo per "+HHMM" string.
+    sign = 1 if tz[0] == "+" else -1
+    hours = int(tz[1:3])
+    mins = int(tz[3:5])
+    return timezone(sign * timedelta(hours=hours, minutes=mins))
 
 
 def to_iso8601_z(dt: datetime) -> str:
     dt_utc = dt.astimezone(timezone.utc)
     return dt_utc.replace(tzinfo=timezone.utc).isoformat().replace("+00:00", "Z")
+
+
+def hl7_ts_to_iso8601_z(value: str) -> str:
+    """
+    HL7 TS -> ISO 8601 UTC string ("" if missing/unparseable).
+    Same result as to_iso8601_z(parse_hl7_ts_to_datetime(value)), but UTC values
+    (no offset, +0000 or -0000) are formatted directly without building a datetime.
+    """
+    if not value:
+        return ""
+    fields = _parse_ts_positional(value) or _parse_ts_regex(value)
+    if fields is None:
+        return ""
+
+    yyyy, mm, dd, hh, mi, ss, micro, tz = fields
+    # Anything that might be an invalid date (or need a day rollover) goes through
+    # datetime so it is validated/normalized exactly as before.
+    if (
+        (not tz or tz[1:] == "0000")
+        and yyyy >= 1
+        and 1 <= mm <= 12
+        and 1 <= dd <= 28
+        and hh < 24
+        and mi < 60
+        and ss < 60
+    ):
+        frac = f".{micro:06d}" if micro else ""
+        return f"{yyyy:04d}-{mm:02d}-{dd:02d}T{hh:02d}:{mi:02d}:{ss:02d}{frac}Z"
+
+    tzinfo = _tz_from_offset(tz) if tz else timezone.utc
+    dt = datetime(yyyy, mm, dd, hh, mi, ss, microsecond=micro, tzinfo=tzinfo)
+    return to_iso8601_z(dt)
@@ -1,119 +1,85 @@
 from __future__ import annotations
 
-from typing import Any, Dict
+from typing import Any, Dict, Optional, Tuple
 
-from .hl7 import HL7Message, parse_hl7_date, parse_hl7_ts_to_datetime, to_iso8601_z
+from .hl7 import HL7Message, hl7_ts_to_iso8601_z, parse_hl7_date
 from .exceptions import MissingSegment, UnsupportedMessageType
 
 
-def _first_nonempty(*vals: str) -> str:
-    for v in vals:
-        if v:
-            return v
-    return ""
+def _padded(comps: Tuple[str, ...], width: int) -> Tuple[str, ...]:
+    # Components past the end of a field read as "" (negative repeat is a no-op).
+    return comps + ("",) * (width - len(comps))
 
 
 def validate_siu_s12(msg: HL7Message) -> None:
-    mt_1 = msg.get_component("MSH", 9, 1, default="")
-    mt_2 = msg.get_component("MSH", 9, 2, default="")
-    if (mt_1, mt_2) != ("SIU", "S12"):
-        raw = msg.get_field("MSH", 9, default="")
+    # MSH-9.1 == SIU and MSH-9.2 == S12, checked on the raw field: it must start with
+    # "SIU^S12" followed by nothing, another component or another repetition.
+    # (Escape sequences never unescape to letters, so no component parsing is needed.)
+    raw = msg.get_field("MSH", 9, default="")
+    seps = msg.seps
+    prefix = "SIU" + seps.component + "S12"
+    after = raw[len(prefix):len(prefix) + 1]
+    if not raw.startswith(prefix) or after not in ("", seps.component, seps.repetition):
         raise UnsupportedMessageType(f"Unsupported message type in MSH-9: '{raw}'")
 
 
-def parse_siu_s12_appointment(msg: HL7Message) -> Dict[str, Any]:
-    validate_siu_s12(msg)
+def _extract(msg: HL7Message, sch: int, pid: Optional[int], pv1: Optional[int]) -> Dict[str, Any]:
+    # Segment positions are looked up once; a missing PID/PV1 (None) reads as empty fields.
+    # Fallback chains short-circuit: later lookups only run when earlier ones are empty.
+    field = msg.field_at
+    component = msg.component_at
 
-    if "SCH" not in msg.segments:
-        raise MissingSegment("Missing SCH segment (required for appointment).")
-
-    appt_id = _first_nonempty(
-        msg.get_component("SCH", 1, 1, default=""),
-        msg.get_component("SCH", 2, 1, default=""),
-        msg.get_field("SCH", 1, default=""),
-        msg.get_field("SCH", 2, default=""),
+    appt_id = (
+        component(sch, 1, 1)
+        or component(sch, 2, 1)
+        or field(sch, 1)
+        or field(sch, 2)
     )
-
-    dt_raw = _first_nonempty(
-        msg.get_component("SCH", 11, 4, default=""),
-        msg.get_component("SCH", 11, 1, default=""),
-        msg.get_field("SCH", 11, default=""),
-    )
-    dt_obj = parse_hl7_ts_to_datetime(dt_raw)
-    appt_datetime_iso = to_iso8601_z(dt_obj) if dt_obj else ""
+    dt_raw = component(sch, 11, 4) or component(sch, 11, 1) or field(sch, 11)
 
     # Patient
-    pid_present = "PID" in msg.segments
-    patient_id = (
-        _first_nonempty(
-            msg.get_component("PID", 3, 1, default=""),
-            msg.get_component("PID", 2, 1, default=""),
-            msg.get_field("PID", 3, default=""),
-        )
-        if pid_present
-        else ""
-    )
-    patient_last = msg.get_component("PID", 5, 1, default="") if pid_present else ""
-    patient_first = msg.get_component("PID", 5, 2, default="") if pid_present else ""
-    dob_raw = msg.get_field("PID", 7, default="") if pid_present else ""
-    dob = parse_hl7_date(dob_raw)
-    gender = msg.get_field("PID", 8, default="") if pid_present else ""
+    patient_id = component(pid, 3, 1) or component(pid, 2, 1) or field(pid, 3)
+    patient_last, patient_first = _padded(msg.components_at(pid, 5), 2)[:2]
+    dob = parse_hl7_date(field(pid, 7))
 
     # Provider (robust fallback for malformed PV1)
-    pv1_present = "PV1" in msg.segments
     prov_id = ""
     prov_name = ""
-
-    if pv1_present:
-        provider_field = None
-        for f in (7, 6, 8, 9):
-            if msg.get_field("PV1", f, default=""):
-                provider_field = f
-                break
-
-        if provider_field is not None:
-            prov_id = msg.get_component("PV1", provider_field, 1, default="")
-            prov_family = msg.get_component("PV1", provider_field, 2, default="")
-            prov_given = msg.get_component("PV1", provider_field, 3, default="")
-            prov_prefix = msg.get_component("PV1", provider_field, 6, default="")
-
-            prov_name_parts = [p for p in [prov_prefix, prov_given, prov_family] if p]
-            prov_name = " ".join(prov_name_parts)
+    provider_field = next((f for f in (7, 6, 8, 9) if field(pv1, f)), None)
+    if provider_field is not None:
+        comps = _padded(msg.components_at(pv1, provider_field), 6)
+        prov_id, prov_family, prov_given = comps[0:3]
+        prov_prefix = comps[5]
+        prov_name = " ".join(filter(None, (prov_prefix, prov_given, prov_family)))
 
     # Location
-    if pv1_present:
-        loc_poc = msg.get_component("PV1", 3, 1, default="")
-        loc_room = msg.get_component("PV1", 3, 2, default="")
-        loc_bed = msg.get_component("PV1", 3, 3, default="")
-        loc_fac = msg.get_component("PV1", 3, 4, default="")
-        location = " ".join([p for p in [loc_fac, loc_poc, loc_room, loc_bed] if p]).strip()
-    else:
-        location = ""
+    loc_poc, loc_room, loc_bed, loc_fac = _padded(msg.components_at(pv1, 3), 4)[:4]
+    location = " ".join(filter(None, (loc_fac, loc_poc, loc_room, loc_bed))).strip()
 
     # Reason
-    reason = _first_nonempty(
-        msg.get_component("SCH", 7, 2, default=""),
-        msg.get_component("SCH", 7, 1, default=""),
-        msg.get_field("SCH", 7, default=""),
-
-        msg.get_component("SCH", 8, 2, default=""),
-        msg.get_component("SCH", 8, 1, default=""),
-        msg.get_field("SCH", 8, default=""),
-
-        msg.get_component("SCH", 6, 2, default=""),
-        msg.get_component("SCH", 6, 1, default=""),
-        msg.get_field("SCH", 6, default=""),
+    reason = (
+        component(sch, 7, 2)
+        or component(sch, 7, 1)
+        or field(sch, 7)
+
+        or component(sch, 8, 2)
+        or component(sch, 8, 1)
+        or field(sch, 8)
+
+        or component(sch, 6, 2)
+        or component(sch, 6, 1)
+        or field(sch, 6)
     )
 
     return {
         "appointment_id": appt_id,
-        "appointment_datetime": appt_datetime_iso,
+        "appointment_datetime": hl7_ts_to_iso8601_z(dt_raw),
         "patient": {
             "id": patient_id,
             "first_name": patient_first,
             "last_name": patient_last,
             "dob": dob.isoformat() if dob else "",
-            "gender": gender,
+            "gender": field(pid, 8),
         },
         "provider": {
             "id": prov_id,
@@ -121,4 +87,14 @@ def parse_siu_s12_appointment(msg: HL7Message) -> Dict[str, Any]:
         },
         "location": location,
         "reason": reason,
-    }
\ No newline at end of file
+    }
+
+
+def parse_siu_s12_appointment(msg: HL7Message) -> Dict[str, Any]:
+    validate_siu_s12(msg)
+
+    sch = msg.find_segment("SCH")
+    if sch is None:
+        raise MissingSegment("Missing SCH segment (required for appointment).")
+
+    return _extract(msg, sch, msg.find_segment("PID"), msg.find_segment("PV1"))
@@ -1,7 +1,16 @@
+import os
+import tempfile
 import unittest
 
-from hl7_siu_parser.hl7 import split_messages, parse_message, parse_hl7_ts_to_datetime, to_iso8601_z
-from hl7_siu_parser.siu_s12 import parse_siu_s12_appointment
+from hl7_siu_parser.hl7 import (
+    split_messages,
+    iter_messages_from_file,
+    parse_message,
+    parse_hl7_ts_to_datetime,
+    to_iso8601_z,
+    hl7_ts_to_iso8601_z,
+)
+from hl7_siu_parser.siu_s12 import parse_siu_s12_appointment, validate_siu_s12
 from hl7_siu_parser.exceptions import UnsupportedMessageType, MissingSegment
 
 
@@ -28,6 +37,14 @@ class TestSIUS12(unittest.TestCase):
         msgs = split_messages(raw)
         self.assertEqual(len(msgs), 2)
 
+    def test_stream_messages_from_file(self):
+        # A BOM only counts at the start of the file; later it is part of the line.
+        raw = "\ufeff" + VALID_SIU.replace("\r", "\r\n") + "\n" + WRONG_TYPE + "\ufeff" + VALID_SIU
+        with tempfile.NamedTemporaryFile("w", suffix=".hl7", delete=False, newline="") as f:
+            f.write(raw)
+        self.addCleanup(os.remove, f.name)
+        self.assertEqual(list(iter_messages_from_file(f.name)), split_messages(raw))
+
     def test_parse_valid_siu(self):
         msg = parse_message(VALID_SIU)
         appt = parse_siu_s12_appointment(msg)
@@ -41,11 +58,41 @@ class TestSIUS12(unittest.TestCase):
         # Location is best-effort from PV1-3
         self.assertIn("MainFacility", appt["location"])
 
+    def test_location_is_trimmed(self):
+        msg = parse_message(VALID_SIU.replace("ClinicA^203^^MainFacility", " 9^ ^^"))
+        self.assertEqual(parse_siu_s12_appointment(msg)["location"], "9")
+
+    def test_field_and_component_lookup(self):
+        msg = parse_message(VALID_SIU.replace("P12345^^^HOSP^MR", "P12345^^^HOSP^MR~A999^^^ALT"))
+        self.assertEqual(msg.get_field("MSH", 1), "|")
+        self.assertEqual(msg.get_field("MSH", 2), "^~\\&")
+        self.assertEqual(msg.get_field("PID", 3), "P12345^^^HOSP^MR~A999^^^ALT")
+        self.assertEqual(msg.get_component("PID", 3, 4), "HOSP")
+        self.assertEqual(msg.get_component("PID", 3, 1, rep_index=1), "A999")
+        self.assertEqual(msg.get_component("PID", 3, 9, default="x"), "x")
+        self.assertEqual(msg.segment_positions["PID"], [msg.find_segment("PID")])
+        self.assertEqual(msg.segments["PID"][0][3], "P12345^^^HOSP^MR~A999^^^ALT")
+
+    def test_escape_sequences(self):
+        msg = parse_message(VALID_SIU.replace("^General Consultation", "^Follow\\T\\up \\F\\ review"))
+        self.assertEqual(msg.get_component("SCH", 8, 2), "Follow&up | review")
+        self.assertEqual(msg.get_component("PID", 5, 1), "Doe")
+        self.assertEqual(parse_siu_s12_appointment(msg)["reason"], "Follow&up | review")
+
     def test_reject_wrong_message_type(self):
         msg = parse_message(WRONG_TYPE)
         with self.assertRaises(UnsupportedMessageType):
             parse_siu_s12_appointment(msg)
 
+    def test_message_type_check(self):
+        for msh9 in ("SIU^S12", "SIU^S12^SIU_S12", "SIU^S12~X"):
+            with self.subTest(msh9=msh9):
+                validate_siu_s12(parse_message(WRONG_TYPE.replace("ADT^A01", msh9)))
+        for msh9 in ("SIU^S12X", "SIU^S12&x", "SIU\\S\\S12", "SIU^S13", "SIU", ""):
+            with self.subTest(msh9=msh9):
+                with self.assertRaises(UnsupportedMessageType):
+                    validate_siu_s12(parse_message(WRONG_TYPE.replace("ADT^A01", msh9)))
+
     def test_missing_sch_segment(self):
         msg = parse_message(MISSING_SCH)
         with self.assertRaises(MissingSegment):
@@ -56,6 +103,13 @@ class TestSIUS12(unittest.TestCase):
         self.assertIsNotNone(dt)
         self.assertEqual(to_iso8601_z(dt), "2025-05-02T07:00:00Z")  # 13:00 at +06:00 is 07:00Z
 
+    def test_direct_iso8601_formatting(self):
+        self.assertEqual(hl7_ts_to_iso8601_z("20250502130000+0600"), "2025-05-02T07:00:00Z")
+        self.assertEqual(hl7_ts_to_iso8601_z("20250502130000.25"), "2025-05-02T13:00:00.250000Z")
+        self.assertEqual(hl7_ts_to_iso8601_z("20250531230000-0200"), "2025-06-01T01:00:00Z")
+        self.assertEqual(hl7_ts_to_iso8601_z("2025"), "2025-01-01T00:00:00Z")
+        self.assertEqual(hl7_ts_to_iso8601_z("not-a-ts"), "")
+
 
 if __name__ == "__main__":
     unittest.main()